@@ -1,55 +1,330 @@
 """
 API handlers for kernel path resolution.
 """
-import json
+import functools
+import importlib
 import os
 import re
+import stat
+import time
 
 from jupyter_server.base.handlers import APIHandler
 from jupyter_server.utils import url_path_join
 from jupyter_client.kernelspec import KernelSpecManager
 import tornado
 
+# Optional dynamic kernel providers as (label, module, class). They are
+# imported on the first request so they do not slow down server startup
+_PROVIDERS = (
+    ("conda", "nb_conda_kernels", "CondaKernelSpecManager"),
+    ("venv", "nb_venv_kernels", "VEnvKernelSpecManager"),
+)
+
+# How long merged kernelspecs are reused before rescanning the data dirs
+_SPEC_CACHE_TTL = 10.0  # seconds
+
+# Base conda installs live under a handful of well-known prefixes, with a
+# variable user name for per-user miniconda/anaconda installs
+_BASE_CONDA_RE = re.compile(
+    r"^(/opt/conda|/home/[^/]+/(?:mini)?conda3?|/usr/local/conda)(?:/bin/python.*)?$"
+)
+
+
+def _stat(path: str, stat_cache: dict) -> os.stat_result | None:
+    """Stat a path at most once per stat cache.
+
+    Args:
+        path: Path to stat
+        stat_cache: Dict of already stat'ed paths, updated in place
+
+    Returns:
+        The stat result, or None if the path does not exist
+    """
+    if path not in stat_cache:
+        try:
+            stat_cache[path] = os.stat(path)
+        except (OSError, ValueError):
+            stat_cache[path] = None
+    return stat_cache[path]
+
+
+def _is_dir(path: str, stat_cache: dict) -> bool:
+    """Cached equivalent of ``os.path.isdir``."""
+    st = _stat(path, stat_cache)
+    return st is not None and stat.S_ISDIR(st.st_mode)
+
+
+def _env_root_from_executable(path: str) -> str | None:
+    """Return the environment root for a ``<env>/bin/python*`` path.
+
+    Args:
+        path: Path to a Python executable
+
+    Returns:
+        The directory containing ``bin/``, or None if the path does not
+        end in ``bin/python*``
+    """
+    head, sep, tail = path.rpartition("/bin/")
+    if sep and tail.startswith("python"):
+        return head
+    return None
+
+
+def _venv_project_root(path: str, stat_cache: dict) -> str | None:
+    """Return the project root for a path inside a ``.venv`` directory.
+
+    Args:
+        path: Path to check, e.g. /project/.venv/bin/python
+        stat_cache: Dict of already stat'ed paths, updated in place
+
+    Returns:
+        The existing directory one level up from ``.venv``, or None
+    """
+    # Check for /.venv/ (with trailing slash - .venv as intermediate directory)
+    if "/.venv/" in path:
+        project_root = path.partition("/.venv/")[0]
+        if _is_dir(project_root, stat_cache):
+            return project_root
+    # Check for /.venv at end of a path segment (e.g., if path ends with .venv)
+    elif "/.venv" in path:
+        project_root, _, remaining = path.partition("/.venv")
+        # Make sure it's actually .venv directory, not something like .venv-backup
+        if remaining == "" or remaining.startswith("/"):
+            if _is_dir(project_root, stat_cache):
+                return project_root
+    return None
+
+
+def _is_conda_env_dir(path: str) -> bool:
+    """Check whether a path has the ``.../envs/<name>`` or ``.../conda/<name>`` shape.
+
+    Args:
+        path: Candidate environment directory
+
+    Returns:
+        True if the last two path components are ``envs|conda`` and a name
+    """
+    parts = path.split("/")
+    return len(parts) >= 3 and parts[-2] in ("envs", "conda") and parts[-1] != ""
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_env_path(
+    executable_path: str | None,
+    resource_dir: str
+) -> tuple[str | None, bool]:
+    """Extract the project path from the executable.
+
+    For uv/venv environments (.venv folder), returns the project root
+    (one level up from .venv). For conda local environments, returns
+    two levels up. For system/global conda, returns the environment root.
+
+    Results are memoized per (executable_path, resource_dir); the cache is
+    cleared whenever the kernelspec cache is rebuilt.
+
+    Args:
+        executable_path: Path to the Python executable
+        resource_dir: The kernel's resource directory
+
+    Returns:
+        Tuple of (path, is_global_conda):
+        - path: The project or environment root path, or None if not determinable
+        - is_global_conda: True if this is a global conda environment
+    """
+    # Every existence check below goes through one os.stat per path
+    stat_cache = {}
+
+    # PRIORITY CHECK: If .venv is in resource_dir, extract project root
+    # This handles conda local envs where argv[0] is just "python" (relative)
+    # but resource_dir contains the full path like:
+    # /project/.venv/envname/share/jupyter/kernels/python3
+    if resource_dir and "/.venv/" in resource_dir:
+        project_root = resource_dir.partition("/.venv/")[0]
+        if _is_dir(project_root, stat_cache):
+            return (project_root, False)
+
+    if not executable_path:
+        return (None, False)
+
+    # Use original path first (before symlink resolution) for .venv detection
+    # This is important because .venv/bin/python often symlinks to system Python
+    original_path = executable_path
+
+    # Priority check: If .venv is anywhere in the path, navigate to one
+    # level up from .venv
+    # Handles both: /project/.venv/bin/python and /project/.venv/envname/bin/python
+    project_root = _venv_project_root(original_path, stat_cache)
+    if project_root is not None:
+        return (project_root, False)
+
+    # Pattern 2: Named virtualenv - /path/to/venv/bin/python (not .venv)
+    # Check if there's a pyvenv.cfg in the parent of bin/
+    potential_venv = _env_root_from_executable(original_path)
+    if potential_venv is not None:
+        pyvenv_cfg = os.path.join(potential_venv, "pyvenv.cfg")
+        if _stat(pyvenv_cfg, stat_cache) is not None:
+            # For named venvs, return the venv directory itself
+            return (potential_venv, False)
+
+    # Resolve symlinks for additional pattern matching. Deferred until
+    # here since realpath costs an lstat per path component and the
+    # venv checks above only need the original path
+    try:
+        real_path = os.path.realpath(executable_path)
+    except (OSError, ValueError):
+        real_path = executable_path
+
+    # Repeat the .venv priority check on the resolved path
+    if real_path != original_path:
+        project_root = _venv_project_root(real_path, stat_cache)
+        if project_root is not None:
+            return (project_root, False)
+
+    potential_env = _env_root_from_executable(real_path)
+
+    if potential_env is not None:
+        # Pattern 3: Conda local environment - /project/subdir/envs/envname/bin/python
+        # Return project root (two levels up from envs/envname)
+        parts = potential_env.split("/")
+        if len(parts) >= 4 and parts[-2] == "envs" and parts[-1] and parts[-3]:
+            # Check if this looks like a local project env (not system conda)
+            subdir = parts[-3]
+            project_root = "/".join(parts[:-3])
+            # If it's under a typical project structure, go to project root
+            if (
+                subdir not in ("opt", "usr", "home")
+                and _is_dir(project_root, stat_cache)
+            ):
+                return (project_root, False)
+
+    # Pattern 4: Global conda environment - /opt/conda/envs/envname/bin/python
+    # or ~/miniconda3/envs/envname/bin/python
+    # Return the environment root (this is a global conda environment)
+    if _is_conda_env_dir(real_path):
+        return (real_path, True)
+    if potential_env is not None and _is_conda_env_dir(potential_env):
+        return (potential_env, True)
+
+    # Pattern 5: Base conda - /opt/conda/bin/python or similar
+    # This is also a global conda environment
+    base_conda_match = _BASE_CONDA_RE.match(real_path)
+    if base_conda_match:
+        return (base_conda_match.group(1), True)
+
+    # Pattern 6: System Python with kernelspec in share/jupyter/kernels
+    # Return the directory containing the kernelspec
+    if "/share/jupyter/kernels/" in resource_dir:
+        # Go up to the environment root
+        # e.g., /opt/conda/share/jupyter/kernels/python3 -> /opt/conda
+        parts = resource_dir.split("/share/jupyter/kernels/")
+        if parts[0]:
+            return (parts[0], True)
+
+    # Fallback: try to find environment root from executable path structure
+    if potential_env is not None:
+        # Verify it looks like an environment (has bin, lib, etc.)
+        if _is_dir(os.path.join(potential_env, "lib"), stat_cache):
+            return (potential_env, False)
+
+    return (None, False)
+
 
 class KernelPathHandler(APIHandler):
     """Handler for getting kernel installation path by display name."""
 
+    # Tornado creates a handler per request, so shared state lives on the class
+    _spec_cache: dict | None = None
+    _spec_cache_ts: float = 0.0
+    _display_index: dict = {}
+
+    def _get_spec_managers(self) -> tuple[KernelSpecManager, list]:
+        """Get the kernelspec managers, creating them on first use.
+
+        The managers are kept in the web app settings so they are built
+        once per server rather than per request. Optional providers are
+        imported here instead of at module load.
+
+        Returns:
+            Tuple of (standard manager, list of (label, manager) tuples
+            for installed dynamic providers)
+        """
+        settings = self.settings
+        if "kernel_path_ext_ksm" not in settings:
+            providers = []
+            for label, module_name, class_name in _PROVIDERS:
+                try:
+                    module = importlib.import_module(module_name)
+                    providers.append((label, getattr(module, class_name)()))
+                except ImportError:
+                    pass
+                except Exception as e:
+                    self.log.debug(f"Error loading {label} kernels: {e}")
+            settings["kernel_path_ext_provider_ksms"] = providers
+            settings["kernel_path_ext_ksm"] = KernelSpecManager()
+
+        return (
+            settings["kernel_path_ext_ksm"],
+            settings["kernel_path_ext_provider_ksms"],
+        )
+
     def _get_all_kernelspecs(self) -> dict:
         """Get all kernelspecs from standard and dynamic providers.
 
         Queries the standard KernelSpecManager plus any installed dynamic
-        kernel providers like nb_conda_kernels and nb_venv_kernels.
+        kernel providers like nb_conda_kernels and nb_venv_kernels. The
+        merged result is cached for ``_SPEC_CACHE_TTL`` seconds, together
+        with an index of the kernelspecs by display name.
 
         Returns:
             Combined dict of all available kernelspecs
         """
+        now = time.monotonic()
+        if (
+            KernelPathHandler._spec_cache is not None
+            and now - KernelPathHandler._spec_cache_ts < _SPEC_CACHE_TTL
+        ):
+            return KernelPathHandler._spec_cache
+
         all_specs = {}
 
+        ksm, provider_ksms = self._get_spec_managers()
+
         # Standard kernelspecs
-        ksm = KernelSpecManager()
         all_specs.update(ksm.get_all_specs())
 
-        # Try nb_conda_kernels if available
-        try:
-            from nb_conda_kernels import CondaKernelSpecManager
-            cksm = CondaKernelSpecManager()
-            all_specs.update(cksm.get_all_specs())
-        except ImportError:
-            pass
-        except Exception as e:
-            self.log.debug(f"Error loading conda kernels: {e}")
+        # Dynamic providers like nb_conda_kernels and nb_venv_kernels
+        for label, manager in provider_ksms:
+            try:
+                all_specs.update(manager.get_all_specs())
+            except Exception as e:
+                self.log.debug(f"Error loading {label} kernels: {e}")
+
+        # Resolved env paths may be stale once kernelspecs change
+        _resolve_env_path.cache_clear()
+
+        # Index by display name; the first kernelspec wins on duplicates
+        display_index = {}
+        for name, spec_data in all_specs.items():
+            display_name = spec_data.get("spec", {}).get("display_name")
+            if display_name:
+                display_index.setdefault(display_name, (name, spec_data))
+
+        KernelPathHandler._spec_cache = all_specs
+        KernelPathHandler._display_index = display_index
+        KernelPathHandler._spec_cache_ts = now
+        return all_specs
 
-        # Try nb_venv_kernels if available
-        try:
-            from nb_venv_kernels import VEnvKernelSpecManager
-            vksm = VEnvKernelSpecManager()
-            all_specs.update(vksm.get_all_specs())
-        except ImportError:
-            pass
-        except Exception as e:
-            self.log.debug(f"Error loading venv kernels: {e}")
+    def _find_kernelspec(self, display_name: str) -> tuple[str | None, dict | None]:
+        """Find the kernelspec with the given display name.
 
-        return all_specs
+        Args:
+            display_name: The display name of the kernel
+
+        Returns:
+            Tuple of (kernel_name, spec_data), or (None, None) if not found
+        """
+        self._get_all_kernelspecs()
+        return KernelPathHandler._display_index.get(display_name, (None, None))
 
     @tornado.web.authenticated
     async def get(self, display_name: str):
@@ -59,25 +334,15 @@ class KernelPathHandler(APIHandler):
             display_name: The display name of the kernel (URL-decoded by tornado)
         """
         try:
-            # Get all available kernelspecs including dynamic providers
-            all_specs = self._get_all_kernelspecs()
-
-            # Find the kernel matching the display name
-            kernel_info = None
-            kernel_name = None
-
-            for name, spec_data in all_specs.items():
-                spec = spec_data.get("spec", {})
-                if spec.get("display_name") == display_name:
-                    kernel_name = name
-                    kernel_info = spec_data
-                    break
+            # Find the kernel matching the display name across all
+            # available kernelspecs including dynamic providers
+            kernel_name, kernel_info = self._find_kernelspec(display_name)
 
             if kernel_info is None:
                 self.set_status(404)
-                self.finish(json.dumps({
+                self.finish({
                     "error": f"Kernel with display name '{display_name}' not found"
-                }))
+                })
                 return
 
             spec = kernel_info.get("spec", {})
@@ -92,21 +357,21 @@ class KernelPathHandler(APIHandler):
                 executable_path, resource_dir
             )
 
-            self.finish(json.dumps({
+            self.finish({
                 "kernel_name": kernel_name,
                 "display_name": display_name,
                 "resource_dir": resource_dir,
                 "executable_path": executable_path,
                 "env_path": env_path,
                 "is_global_conda": is_global_conda
-            }))
+            })
 
         except Exception as e:
             self.log.error(f"Error getting kernel path: {e}")
             self.set_status(500)
-            self.finish(json.dumps({
+            self.finish({
                 "error": str(e)
-            }))
+            })
 
     def _extract_env_path(
         self,
@@ -115,134 +380,9 @@ class KernelPathHandler(APIHandler):
     ) -> tuple[str | None, bool]:
         """Extract the project path from the executable.
 
-        For uv/venv environments (.venv folder), returns the project root
-        (one level up from .venv). For conda local environments, returns
-        two levels up. For system/global conda, returns the environment root.
-
-        Args:
-            executable_path: Path to the Python executable
-            resource_dir: The kernel's resource directory
-
-        Returns:
-            Tuple of (path, is_global_conda):
-            - path: The project or environment root path, or None if not determinable
-            - is_global_conda: True if this is a global conda environment
+        See ``_resolve_env_path``, which this delegates to.
         """
-        # PRIORITY CHECK: If .venv is in resource_dir, extract project root
-        # This handles conda local envs where argv[0] is just "python" (relative)
-        # but resource_dir contains the full path like:
-        # /project/.venv/envname/share/jupyter/kernels/python3
-        if resource_dir and "/.venv/" in resource_dir:
-            venv_idx = resource_dir.find("/.venv/")
-            project_root = resource_dir[:venv_idx]
-            if os.path.isdir(project_root):
-                return (project_root, False)
-
-        if not executable_path:
-            return (None, False)
-
-        # Use original path first (before symlink resolution) for .venv detection
-        # This is important because .venv/bin/python often symlinks to system Python
-        original_path = executable_path
-
-        # Resolve symlinks for additional pattern matching
-        try:
-            real_path = os.path.realpath(executable_path)
-        except (OSError, ValueError):
-            real_path = executable_path
-
-        # Priority check: If .venv is anywhere in the path (original OR resolved),
-        # navigate to one level up from .venv
-        # Handles both: /project/.venv/bin/python and /project/.venv/envname/bin/python
-        for path_to_check in [original_path, real_path]:
-            # Check for /.venv/ (with trailing slash - .venv as intermediate directory)
-            if "/.venv/" in path_to_check:
-                venv_idx = path_to_check.find("/.venv/")
-                project_root = path_to_check[:venv_idx]
-                if os.path.isdir(project_root):
-                    return (project_root, False)
-            # Check for /.venv at end of a path segment (e.g., if path ends with .venv)
-            elif "/.venv" in path_to_check:
-                venv_idx = path_to_check.find("/.venv")
-                # Make sure it's actually .venv directory, not something like .venv-backup
-                remaining = path_to_check[venv_idx + 6:]  # after "/.venv"
-                if remaining == "" or remaining.startswith("/"):
-                    project_root = path_to_check[:venv_idx]
-                    if os.path.isdir(project_root):
-                        return (project_root, False)
-
-        # Pattern 1: uv/venv with .venv folder - /project/.venv/bin/python
-        # Return project root (one level up from .venv)
-        # Check original path first (before symlink resolution)
-        venv_dot_match = re.match(r"^(.*)/(\.venv)/bin/python.*$", original_path)
-        if venv_dot_match:
-            project_root = venv_dot_match.group(1)
-            if os.path.isdir(project_root):
-                return (project_root, False)
-
-        # Pattern 2: Named virtualenv - /path/to/venv/bin/python (not .venv)
-        # Check if there's a pyvenv.cfg in the parent of bin/
-        venv_match = re.match(r"^(.*)/bin/python.*$", original_path)
-        if venv_match:
-            potential_venv = venv_match.group(1)
-            pyvenv_cfg = os.path.join(potential_venv, "pyvenv.cfg")
-            if os.path.exists(pyvenv_cfg):
-                # For named venvs, return the venv directory itself
-                return (potential_venv, False)
-
-        # Pattern 3: Conda local environment - /project/subdir/envs/envname/bin/python
-        # Return project root (two levels up from envs/envname)
-        conda_local_match = re.match(
-            r"^(.*)/([^/]+)/envs/([^/]+)/bin/python.*$",
-            real_path
-        )
-        if conda_local_match:
-            # Check if this looks like a local project env (not system conda)
-            potential_project = conda_local_match.group(1)
-            subdir = conda_local_match.group(2)
-            # If it's under a typical project structure, go to project root
-            if subdir not in ("opt", "usr", "home"):
-                project_root = potential_project
-                if os.path.isdir(project_root):
-                    return (project_root, False)
-
-        # Pattern 4: Global conda environment - /opt/conda/envs/envname/bin/python
-        # or ~/miniconda3/envs/envname/bin/python
-        # Return the environment root (this is a global conda environment)
-        conda_global_match = re.match(
-            r"^(.*/(?:envs|conda)/[^/]+)(?:/bin/python.*)?$",
-            real_path
-        )
-        if conda_global_match:
-            return (conda_global_match.group(1), True)
-
-        # Pattern 5: Base conda - /opt/conda/bin/python or similar
-        # This is also a global conda environment
-        base_conda_match = re.match(
-            r"^(/opt/conda|/home/[^/]+/(?:mini)?conda3?|/usr/local/conda)(?:/bin/python.*)?$",
-            real_path
-        )
-        if base_conda_match:
-            return (base_conda_match.group(1), True)
-
-        # Pattern 6: System Python with kernelspec in share/jupyter/kernels
-        # Return the directory containing the kernelspec
-        if "/share/jupyter/kernels/" in resource_dir:
-            # Go up to the environment root
-            # e.g., /opt/conda/share/jupyter/kernels/python3 -> /opt/conda
-            parts = resource_dir.split("/share/jupyter/kernels/")
-            if parts[0]:
-                return (parts[0], True)
-
-        # Fallback: try to find environment root from executable path structure
-        bin_match = re.match(r"^(.*)/bin/python.*$", real_path)
-        if bin_match:
-            potential_env = bin_match.group(1)
-            # Verify it looks like an environment (has bin, lib, etc.)
-            if os.path.isdir(os.path.join(potential_env, "lib")):
-                return (potential_env, False)
-
-        return (None, False)
+        return _resolve_env_path(executable_path, resource_dir)
 
 
 def setup_handlers(web_app):
@@ -255,12 +395,13 @@ def setup_handlers(web_app):
     base_url = web_app.settings["base_url"]
 
     # Route pattern for kernel path endpoint
-    # The display_name may contain special characters, so we use a broad pattern
+    # The display_name is a single percent-encoded path segment: callers must
+    # encode "/" (encodeURIComponent does), tornado decodes it before get()
     route_pattern = url_path_join(
         base_url,
         "api",
         "kernel-path",
-        "(.+)"  # display_name parameter (URL-encoded)
+        "([^/]+)"  # display_name parameter (URL-encoded)
     )
 
     handlers = [(route_pattern, KernelPathHandler)]